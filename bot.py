@@ -8,18 +8,42 @@ from discord.ext import commands
 import aiohttp
 import asyncio
 import time
-import psutil
 import os
+import json
+from cachetools import TTLCache
 from datetime import datetime, timedelta
 import logging
 
-from scraper import RTanksScraper
-from utils import format_number, format_exact_number, get_rank_emoji, format_duration
-from config import RANK_EMOJIS, PREMIUM_EMOJI, GOLD_BOX_EMOJI, RTANKS_BASE_URL
+from scraper import RTanksScraper, create_http_session, single_flight
+from utils import format_number, format_duration, format_player_card
+from config import (
+    RANK_EMOJIS, RANK_EMOJI_URLS, PREMIUM_EMOJI, GOLD_BOX_EMOJI, RTANKS_BASE_URL,
+    STATUS_CACHE_TTL, STATS_FILE, STATS_FLUSH_INTERVAL, MAX_CONCURRENT_SCRAPES
+)
 
 logger = logging.getLogger(__name__)
 
 class RTanksBot(commands.Bot):
+    # Counters that are persisted across restarts
+    _PERSISTED_STATS = (
+        'commands_processed',
+        'scraping_successes',
+        'scraping_failures',
+        'total_scraping_time',
+        'cache_hits',
+        'cache_misses',
+    )
+
+    # Static /botstats embed field names
+    _FIELD_LATENCY_NAME = "📡 Latency"
+    _FIELD_UPTIME_NAME = "⏱️ Uptime"
+    _FIELD_SERVERS_NAME = "🌐 Servers"
+    _FIELD_COMMANDS_NAME = "📊 Commands"
+    _FIELD_SCRAPING_NAME = "🔍 Scraping Stats"
+    _FIELD_CACHE_NAME = "🗃️ Cache"
+    _FIELD_SYSTEM_NAME = "💻 System Resources"
+    _FIELD_WEBSITE_NAME = "🌍 Website Status"
+
     def __init__(self):
         intents = discord.Intents.default()
         intents.message_content = True
@@ -32,30 +56,66 @@ class RTanksBot(commands.Bot):
         
         # Bot statistics
         self.start_time = datetime.now()
+        self.start_perf = time.perf_counter()
         self.commands_processed = 0
         self.scraping_successes = 0
         self.scraping_failures = 0
         self.total_scraping_time = 0.0
-        
-        # Initialize scraper
-        self.scraper = RTanksScraper()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._stats_task = None
+        self._footer_icon = None
+        
+        # Recently scraped players, keyed by lowercased username
+        self.player_cache = TTLCache(maxsize=1024, ttl=120)
+        self._inflight = {}
+        self._scrape_sem = asyncio.Semaphore(MAX_CONCURRENT_SCRAPES)
+        
+        # Last website status check as (timestamp, status string)
+        self._status_cache = (0.0, None)
+        
+        # Process CPU usage, sampled in the background so /botstats never blocks
+        self._process = None
+        self._cpu = 0.0
+        self._cpu_task = None
+        
+        # Shared HTTP session and scraper, created once the event loop is running
+        self.http_session = None
+        self.scraper = None
     
     async def setup_hook(self):
         """Setup hook called when bot is starting up."""
+        # One session for the bot lifetime so connections are pooled and reused
+        self.http_session = create_http_session(timeout=aiohttp.ClientTimeout(total=10))
+        self.scraper = RTanksScraper(session=self.http_session)
+        
+        # psutil is only needed for /botstats, so load it once the bot is starting
+        import psutil
+        self._process = psutil.Process(os.getpid())
+        self._process.cpu_percent(None)
+        self._cpu_task = asyncio.create_task(self._cpu_sampler())
+        
+        # Restore counters from the last run and keep snapshotting them
+        self._load_stats()
+        self._stats_task = asyncio.create_task(self._stats_flusher())
+        
         # Register commands with the command tree
         self.tree.command(name="player", description="Get RTanks player statistics")(self.player_command_handler)
         self.tree.command(name="botstats", description="Display bot performance statistics")(self.botstats_command_handler)
         
         try:
             synced = await self.tree.sync()
-            logger.info(f"Synced {len(synced)} command(s)")
+            logger.info("Synced %s command(s)", len(synced))
         except Exception as e:
-            logger.error(f"Failed to sync commands: {e}")
+            logger.error("Failed to sync commands: %s", e)
     
     async def on_ready(self):
         """Called when the bot is ready."""
-        logger.info(f'{self.user} has connected to Discord!')
-        logger.info(f'Bot is in {len(self.guilds)} guilds')
+        logger.info('%s has connected to Discord!', self.user)
+        logger.info('Bot is in %s guilds', len(self.guilds))
+        
+        # The bot avatar does not change during a session
+        self._footer_icon = self.user.display_avatar.url if self.user else None
         
         # Set bot status
         activity = discord.Game(name="RTanks Online | /player")
@@ -66,12 +126,11 @@ class RTanksBot(commands.Bot):
         """Slash command to get player statistics."""
         await interaction.response.defer()
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         self.commands_processed += 1
         
         try:
-            # Scrape player data
-            player_data = await self.scraper.get_player_data(username.strip())
+            player_data, scraped = await self._get_player_data(username.strip())
             
             if not player_data:
                 embed = discord.Embed(
@@ -80,20 +139,22 @@ class RTanksBot(commands.Bot):
                     color=0xff0000
                 )
                 await interaction.followup.send(embed=embed)
-                self.scraping_failures += 1
+                if scraped:
+                    self.scraping_failures += 1
                 return
             
             # Create player embed
             embed = await self._create_player_embed(player_data)
             await interaction.followup.send(embed=embed)
             
-            # Update statistics
-            scraping_time = time.time() - start_time
-            self.total_scraping_time += scraping_time
-            self.scraping_successes += 1
+            # Update statistics - cached and shared results did not scrape anything
+            if scraped:
+                scraping_time = time.perf_counter() - start_time
+                self.total_scraping_time += scraping_time
+                self.scraping_successes += 1
             
         except Exception as e:
-            logger.error(f"Error processing player command: {e}")
+            logger.error("Error processing player command: %s", e)
             
             embed = discord.Embed(
                 title="⚠️ Error",
@@ -103,6 +164,29 @@ class RTanksBot(commands.Bot):
             await interaction.followup.send(embed=embed)
             self.scraping_failures += 1
 
+    async def _get_player_data(self, username):
+        """Get player data from the cache, scraping it on a miss.
+
+        Returns (player_data, scraped), where scraped is True only for the caller that ran the scrape.
+        """
+        key = username.lower()
+        player_data = self.player_cache.get(key)
+        if player_data is not None:
+            self.cache_hits += 1
+            return player_data, False
+        
+        async def scrape():
+            self.cache_misses += 1
+            async with self._scrape_sem:
+                player_data = await self.scraper.get_player_data(username)
+            if player_data:
+                self.player_cache[key] = player_data
+            return player_data
+        
+        # Concurrent lookups of the same player wait for the scrape already in flight;
+        # they are neither hits nor misses
+        return await single_flight(self._inflight, key, scrape)
+
     async def botstats_command_handler(self, interaction: discord.Interaction):
         """Slash command to display bot statistics."""
         await interaction.response.defer()
@@ -118,13 +202,11 @@ class RTanksBot(commands.Bot):
             avg_scraping_latency = round((self.total_scraping_time / self.scraping_successes) * 1000, 2)
         
         # Calculate uptime
-        uptime = datetime.now() - self.start_time
-        uptime_str = format_duration(uptime.total_seconds())
+        uptime_str = format_duration(time.perf_counter() - self.start_perf)
         
         # Get system stats
-        process = psutil.Process(os.getpid())
-        memory_usage = round(process.memory_info().rss / 1024 / 1024, 2)  # MB
-        cpu_usage = round(process.cpu_percent(interval=1), 1)
+        memory_usage = round(self._process.memory_info().rss / 1024 / 1024, 2)  # MB
+        cpu_usage = round(self._cpu, 1)
         
         # Calculate success rate
         total_scrapes = self.scraping_successes + self.scraping_failures
@@ -140,40 +222,52 @@ class RTanksBot(commands.Bot):
         
         # Performance metrics
         embed.add_field(
-            name="📡 Latency",
+            name=self._FIELD_LATENCY_NAME,
             value=f"**Discord API:** {bot_latency}ms\n**Scraping Avg:** {avg_scraping_latency}ms",
             inline=True
         )
         
         embed.add_field(
-            name="⏱️ Uptime",
+            name=self._FIELD_UPTIME_NAME,
             value=uptime_str,
             inline=True
         )
         
         embed.add_field(
-            name="🌐 Servers",
+            name=self._FIELD_SERVERS_NAME,
             value=f"{len(self.guilds)}",
             inline=True
         )
         
         # Command statistics
         embed.add_field(
-            name="📊 Commands",
+            name=self._FIELD_COMMANDS_NAME,
             value=f"**Total Processed:** {format_number(self.commands_processed)}\n**Success Rate:** {success_rate}%",
             inline=True
         )
         
         # Scraping statistics
         embed.add_field(
-            name="🔍 Scraping Stats",
+            name=self._FIELD_SCRAPING_NAME,
             value=f"**Successful:** {format_number(self.scraping_successes)}\n**Failed:** {format_number(self.scraping_failures)}",
             inline=True
         )
         
+        # Player cache statistics
+        total_lookups = self.cache_hits + self.cache_misses
+        hit_rate = 0
+        if total_lookups > 0:
+            hit_rate = round((self.cache_hits / total_lookups) * 100, 1)
+        
+        embed.add_field(
+            name=self._FIELD_CACHE_NAME,
+            value=f"**Hits:** {format_number(self.cache_hits)}\n**Misses:** {format_number(self.cache_misses)}\n**Hit Rate:** {hit_rate}%",
+            inline=True
+        )
+        
         # System resources
         embed.add_field(
-            name="💻 System Resources",
+            name=self._FIELD_SYSTEM_NAME,
             value=f"**Memory:** {memory_usage} MB\n**CPU:** {cpu_usage}%",
             inline=True
         )
@@ -181,17 +275,64 @@ class RTanksBot(commands.Bot):
         # Website status
         website_status = await self._check_website_status()
         embed.add_field(
-            name="🌍 Website Status",
+            name=self._FIELD_WEBSITE_NAME,
             value=website_status,
             inline=False
         )
         
-        embed.set_footer(text="RTanks Online Bot", icon_url=self.user.display_avatar.url if self.user else None)
+        embed.set_footer(text="RTanks Online Bot", icon_url=self._footer_icon)
         
         await interaction.followup.send(embed=embed)
 
+    async def _cpu_sampler(self):
+        """Periodically sample process CPU usage without blocking the event loop."""
+        while True:
+            self._cpu = self._process.cpu_percent(None)
+            await asyncio.sleep(5)
+
+    def _load_stats(self):
+        """Load persisted statistics counters, if a snapshot exists."""
+        try:
+            with open(STATS_FILE, 'r', encoding='utf-8') as f:
+                stats = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning("Could not load statistics from %s: %s", STATS_FILE, e)
+            return
+        
+        for name in self._PERSISTED_STATS:
+            if name in stats:
+                setattr(self, name, stats[name])
+
+    def _save_stats(self):
+        """Write the statistics counters to disk atomically."""
+        stats = {name: getattr(self, name) for name in self._PERSISTED_STATS}
+        tmp_path = f"{STATS_FILE}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(stats, f)
+            os.replace(tmp_path, STATS_FILE)
+        except OSError as e:
+            logger.warning("Could not save statistics to %s: %s", STATS_FILE, e)
+
+    async def _stats_flusher(self):
+        """Periodically snapshot statistics so they survive restarts."""
+        while True:
+            await asyncio.sleep(STATS_FLUSH_INTERVAL)
+            self._save_stats()
+
     async def _create_player_embed(self, player_data):
         """Create a formatted embed for player data."""
+        # Format every displayed number once up front
+        card = format_player_card(
+            player_data['rank'],
+            player_data['experience'],
+            player_data.get('max_experience'),
+            player_data['kills'],
+            player_data['deaths']
+        )
+        
         # Create embed with activity status
         activity_status = "Online" if player_data['is_online'] else "Offline"
         profile_url = f"{RTANKS_BASE_URL}/user/{player_data['username']}"
@@ -203,15 +344,9 @@ class RTanksBot(commands.Bot):
             timestamp=datetime.now()
         )
         
-        # Player rank and basic info - make rank emoji bigger
-        rank_emoji = get_rank_emoji(player_data['rank'])
-        
-        # Extract the emoji ID from the custom Discord emoji and use it as thumbnail
-        import re
-        emoji_match = re.search(r':(\d+)>', rank_emoji)
-        if emoji_match:
-            emoji_id = emoji_match.group(1)
-            emoji_url = f"https://cdn.discordapp.com/emojis/{emoji_id}.png"
+        # Use the custom Discord emoji image as thumbnail - make rank emoji bigger
+        emoji_url = RANK_EMOJI_URLS.get(card.rank_emoji)
+        if emoji_url:
             embed.set_thumbnail(url=emoji_url)
         
         # Rank field with just the rank name, no emoji
@@ -222,14 +357,9 @@ class RTanksBot(commands.Bot):
         )
         
         # Experience - show current/max format like "105613/125000"
-        if 'max_experience' in player_data and player_data['max_experience']:
-            exp_display = f"{format_exact_number(player_data['experience'])}/{format_exact_number(player_data['max_experience'])}"
-        else:
-            exp_display = f"{format_exact_number(player_data['experience'])}"
-        
         embed.add_field(
             name="Experience",
-            value=exp_display,
+            value=card.experience,
             inline=True
         )
         
@@ -242,11 +372,11 @@ class RTanksBot(commands.Bot):
         )
         
         # Combat Stats - remove non-custom emojis
-        combat_stats = (
-            f"**Kills:** {format_exact_number(player_data['kills'])}\n"
-            f"**Deaths:** {format_exact_number(player_data['deaths'])}\n"
-            f"**K/D:** {player_data['kd_ratio']}"
-        )
+        combat_stats = "\n".join((
+            f"**Kills:** {card.kills}",
+            f"**Deaths:** {card.deaths}",
+            f"**K/D:** {card.kd_ratio}",
+        ))
         embed.add_field(
             name="Combat Stats",
             value=combat_stats,
@@ -254,10 +384,10 @@ class RTanksBot(commands.Bot):
         )
         
         # Other Stats - always show gold box emoji
-        other_stats = (
-            f"{GOLD_BOX_EMOJI} **Gold Boxes:** {player_data['gold_boxes']}\n"
-            f"**Group:** {player_data['group']}"
-        )
+        other_stats = "\n".join((
+            f"{GOLD_BOX_EMOJI} **Gold Boxes:** {player_data['gold_boxes']}",
+            f"**Group:** {player_data['group']}",
+        ))
         embed.add_field(
             name="Other Stats",
             value=other_stats,
@@ -266,17 +396,18 @@ class RTanksBot(commands.Bot):
         
         # Equipment - show all equipment with exact modification levels
         if player_data['equipment']:
-            equipment_text = ""
+            equipment_lines = []
             
             if player_data['equipment'].get('turrets'):
                 turrets = ", ".join(player_data['equipment']['turrets'])  # Show all turrets
-                equipment_text += f"**Turrets:** {turrets}\n"
+                equipment_lines.append(f"**Turrets:** {turrets}")
             
             if player_data['equipment'].get('hulls'):
                 hulls = ", ".join(player_data['equipment']['hulls'])  # Show all hulls
-                equipment_text += f"**Hulls:** {hulls}"
+                equipment_lines.append(f"**Hulls:** {hulls}")
             
-            if equipment_text:
+            if equipment_lines:
+                equipment_text = "\n".join(equipment_lines)
                 embed.add_field(
                     name="Equipment",
                     value=equipment_text,
@@ -288,25 +419,38 @@ class RTanksBot(commands.Bot):
         return embed
 
     async def _check_website_status(self):
-        """Check if the RTanks website is accessible."""
+        """Check if the RTanks website is accessible, reusing a recent result."""
+        checked_at, status = self._status_cache
+        if status is not None and time.monotonic() - checked_at < STATUS_CACHE_TTL:
+            return status
+        
         try:
-            start_time = time.time()
-            timeout = aiohttp.ClientTimeout(total=10)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get('https://ratings.ranked-rtanks.online/') as response:
-                    response_time = round((time.time() - start_time) * 1000, 2)
-                    if response.status == 200:
-                        return f"🟢 Online ({response_time}ms)"
-                    else:
-                        return f"🟡 Partial ({response.status})"
+            start_time = time.perf_counter()
+            async with self.http_session.get('https://ratings.ranked-rtanks.online/') as response:
+                response_time = round((time.perf_counter() - start_time) * 1000, 2)
+                if response.status == 200:
+                    status = f"🟢 Online ({response_time}ms)"
+                else:
+                    status = f"🟡 Partial ({response.status})"
         except Exception:
-            return "🔴 Offline"
+            status = "🔴 Offline"
+        
+        self._status_cache = (time.monotonic(), status)
+        return status
 
     async def on_command_error(self, ctx, error):
         """Global error handler."""
-        logger.error(f"Command error: {error}")
+        logger.error("Command error: %s", error)
         
     async def close(self):
         """Clean up when bot is closing."""
-        await self.scraper.close()
+        if self._cpu_task:
+            self._cpu_task.cancel()
+        if self._stats_task:
+            self._stats_task.cancel()
+            self._save_stats()
+        if self.scraper:
+            await self.scraper.close()
+        if self.http_session and not self.http_session.closed:
+            await self.http_session.close()
         await super().close()
@@ -38,6 +38,12 @@ RANK_EMOJIS = {
     31: '<:emoji_31:1394989379642064948>', # Legend/Legend Premium
 }
 
+# CDN image URLs for the rank emojis, keyed by the emoji markup
+RANK_EMOJI_URLS = {
+    emoji: f"https://cdn.discordapp.com/emojis/{emoji.rsplit(':', 1)[1].rstrip('>')}.png"
+    for emoji in RANK_EMOJIS.values()
+}
+
 # Special emojis
 GOLD_BOX_EMOJI = '<:emoji_32:1395002503472484352>'  # Gold boxes emoji
 PREMIUM_EMOJI = '<:emoji_33:1395399425102184609>'   # Premium emoji
@@ -45,6 +51,10 @@ PREMIUM_EMOJI = '<:emoji_33:1395399425102184609>'   # Premium emoji
 # RTanks website configuration
 RTANKS_BASE_URL = "https://ratings.ranked-rtanks.online"
 RTANKS_TIMEOUT = 30  # seconds
+PAGE_CACHE_TTL = 60  # seconds to reuse a fetched rankings page
+PAGE_CACHE_SIZE = 4  # most recently used shared rankings pages kept in memory
+MAX_PAGE_BYTES = 512 * 1024  # profile pages are truncated to this many bytes
+STATUS_CACHE_TTL = 30  # seconds to reuse the last website status check
 
 # Bot configuration
 BOT_PREFIX = "!"
@@ -52,9 +62,15 @@ DEFAULT_EMBED_COLOR = 0x00ff00  # Green
 ERROR_EMBED_COLOR = 0xff0000    # Red
 WARNING_EMBED_COLOR = 0xffa500  # Orange
 
+# Statistics persistence
+STATS_FILE = "stats.json"
+STATS_FLUSH_INTERVAL = 300  # seconds between statistics snapshots
+
 # Rate limiting
-REQUEST_DELAY_MIN = 0.5  # minimum delay between requests (seconds)
-REQUEST_DELAY_MAX = 1.5  # maximum delay between requests (seconds)
+RETRY_MAX_ATTEMPTS = 3  # retries after an HTTP 429 response
+RETRY_BASE_DELAY = 1.0  # first backoff delay when no Retry-After is sent (seconds)
+RETRY_MAX_DELAY = 30.0  # upper bound for any backoff delay (seconds)
+MAX_CONCURRENT_SCRAPES = 10  # scrapes allowed to run at the same time
 
 # Equipment lists for parsing
 TURRET_NAMES = [
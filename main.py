@@ -12,6 +12,12 @@ from keep_alive import start_keep_alive  # ✅ Added import
 
 from bot import RTanksBot
 
+# Prefer the faster uvloop event loop when it is installed
+try:
+    from uvloop import run as run_event_loop
+except ImportError:
+    run_event_loop = asyncio.run
+
 # Load environment variables
 load_dotenv()
 
@@ -30,7 +36,7 @@ logger = logging.getLogger(__name__)
 async def main():
     """Main function to start the bot."""
     # ✅ Start the web server before launching the bot
-    start_keep_alive()
+    keep_alive_runner = await start_keep_alive()
 
     # Get Discord token from environment
     token = os.getenv('DISCORD_TOKEN')
@@ -49,13 +55,14 @@ async def main():
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
     except Exception as e:
-        logger.error(f"Bot encountered an error: {e}")
+        logger.error("Bot encountered an error: %s", e)
     finally:
         if not bot.is_closed():
             await bot.close()
+        await keep_alive_runner.cleanup()
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        run_event_loop(main())
     except KeyboardInterrupt:
         logger.info("Application terminated by user")
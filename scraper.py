@@ -5,19 +5,312 @@ Handles scraping player data from the RTanks ratings website.
 
 import aiohttp
 import asyncio
-from bs4 import BeautifulSoup
-import random
+import lxml.etree
+import lxml.html
 import re
+import string
 import logging
+import time
+from collections import OrderedDict
 from urllib.parse import quote
 import json
 
+from config import (
+    TURRET_NAMES, HULL_NAMES, PAGE_CACHE_TTL, PAGE_CACHE_SIZE, MAX_PAGE_BYTES,
+    RETRY_MAX_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY
+)
+from utils import calculate_kd_ratio, rank_for_experience
+
 logger = logging.getLogger(__name__)
 
+# Profile pages are scanned as UTF-8 bytes, where re.IGNORECASE and bytes.lower()
+# only fold ASCII, so Russian words are matched in each casing they are likely to use
+def _case_variants(text):
+    """Encode text as lower, Capitalized, Title and UPPER case, without duplicates."""
+    variants = (text.lower(), text.capitalize(), text.title(), text.upper())
+    return tuple(dict.fromkeys(variant.encode('utf-8') for variant in variants))
+
+def _ci(text):
+    """Bytes pattern matching text in any of its case variants."""
+    return b'(?:' + b'|'.join(re.escape(variant) for variant in _case_variants(text)) + b')'
+
+# Page validity checks, compared against the ASCII-lowercased page
+_NOT_FOUND_MARKERS = (
+    b'player not found',
+    b'user not found',
+    *_case_variants('пользователь не найден'),  # Russian "user not found"
+)
+_PREMIUM_MARKERS = (b'premium', *_case_variants('премиум'))
+_DEFAULT_DATA_PATTERNS = (
+    re.compile(rb'14/400'),  # Default experience pattern
+    re.compile(rb'Kills:\s*0.*Deaths:\s*0.*K/D:\s*0\.00', re.DOTALL),  # Default combat stats
+    re.compile(rb'Group:\s*Unknown'),  # Default group
+    # Rank is exactly "Recruit" with 14/400 experience (template data)
+    re.compile(rb'Recruit.*14/400', re.DOTALL),
+)
+_MEANINGFUL_DATA_PATTERNS = (
+    # Non-zero, non-default stats
+    re.compile(rb'[Kk]ills?[:\s]*([1-9]\d*)', re.IGNORECASE),  # Non-zero kills
+    re.compile(rb'[Dd]eaths?[:\s]*([1-9]\d*)', re.IGNORECASE),  # Non-zero deaths
+    re.compile(rb'(\d{1,3}(?:\s?\d{3})*)\s*/\s*(\d{1,3}(?:\s?\d{3})*)', re.IGNORECASE),  # Experience format
+    # Ranks other than default Recruit
+    re.compile(rb'(Private|Gefreiter|Corporal|Sergeant|Lieutenant|Captain|Major|Colonel|General|Marshal|Commander|Legend)', re.IGNORECASE),
+)
+
+# Activity flag: a hidden span whose text is "yes" or "no", or any such span as a fallback
+_ACTIVITY_RE = re.compile(
+    rb'<span[^>]*style\s*=\s*["\'][^"\']*display\s*:\s*none[^"\']*["\'][^>]*>\s*(yes|no)\s*</span>',
+    re.IGNORECASE
+)
+_ANY_ACTIVITY_RE = re.compile(rb'<span[^>]*>\s*(yes|no)\s*</span>', re.IGNORECASE)
+
+# Experience
+_EXP_PATTERNS = (
+    re.compile(rb'(\d{1,3}(?:\s?\d{3})*)\s*/\s*(\d{1,3}(?:\s?\d{3})*)'),  # Current/max format with spaces
+    re.compile(rb'(\d{1,3}(?:,\d{3})*)\s*/\s*(\d{1,3}(?:,\d{3})*)'),     # Current/max format with commas
+    re.compile(rb'(\d+)\s*/\s*(\d+)'),                                     # Simple current/max format
+)
+_SINGLE_EXP_PATTERNS = (
+    re.compile(rb'Experience[^0-9]*(\d{1,3}(?:,?\d{3})*)', re.IGNORECASE),
+    re.compile(_ci('Опыт') + rb'[^0-9]*(\d{1,3}(?:,?\d{3})*)', re.IGNORECASE),
+    re.compile(rb'"experience"[^0-9]*(\d{1,3}(?:,?\d{3})*)', re.IGNORECASE),
+)
+
+# Thousands separators deleted from numbers before int(), for page bytes and row text
+_NUMBER_SEPARATORS = b', '
+_EXP_STRIP = str.maketrans('', '', ', ')
+
+# First number in a rankings row, taken as the player's experience
+_ROW_EXP_RE = re.compile(r'(\d{1,3}(?:[,\s]\d{3})*)')
+
+# Russian to English rank names
+_RANK_MAPPING = {
+    'Легенда': 'Legend',
+    'Генералиссимус': 'Generalissimo',
+    'Командир бригады': 'Brigadier Commander',
+    'Командир полковник': 'Colonel Commander',
+    'Командир подполковник': 'Lieutenant Colonel Commander',
+    'Командир майор': 'Major Commander',
+    'Командир капитан': 'Captain Commander',
+    'Командир лейтенант': 'Lieutenant Commander',
+    'Командир': 'Commander',
+    'Фельдмаршал': 'Field Marshal',
+    'Маршал': 'Marshal',
+    'Генерал': 'General',
+    'Генерал-лейтенант': 'Lieutenant General',
+    'Генерал-майор': 'Major General',
+    'Бригадир': 'Brigadier',
+    'Полковник': 'Colonel',
+    'Подполковник': 'Lieutenant Colonel',
+    'Майор': 'Major',
+    'Капитан': 'Captain',
+    'Старший лейтенант': 'First Lieutenant',
+    'Лейтенант': 'Second Lieutenant',
+    'Старший прапорщик': 'Master Warrant Officer',
+    'Прапорщик': 'Warrant Officer',
+    'Старшина': 'Sergeant Major',
+    'Старший сержант': 'First Sergeant',
+    'Сержант': 'Master Sergeant',
+    'Младший сержант': 'Staff Sergeant',
+    'Ефрейтор': 'Sergeant',
+    'Старший ефрейтор': 'Master Corporal',
+    'Капрал': 'Corporal',
+    'Гефрейтор': 'Gefreiter',
+    'Рядовой': 'Private',
+    'Новобранец': 'Recruit',
+}
+
+# Every accepted spelling, ASCII-lowercased, mapped to its English rank name
+_RANK_LOOKUP = {
+    variant: english
+    for name, english in _RANK_MAPPING.items()
+    for variant in _case_variants(name)
+}
+_RANK_LOOKUP.update({english.lower().encode('utf-8'): english for english in _RANK_MAPPING.values()})
+
+# One pass over the page finds the rank; longest names come first so that
+# "Brigadier Commander" wins over "Brigadier" at the same position
+_RANK_RE = re.compile(
+    rb'(?P<rank>' + b'|'.join(re.escape(name) for name in sorted(_RANK_LOOKUP, key=len, reverse=True)) + rb')'
+    rb'(?:\s*(?P<legend>\d+))?',
+    re.IGNORECASE
+)
+
+# Combat stats, gold boxes and group. The English labels are found in one pass;
+# the lookahead keeps matches from consuming text, so each field still gets its
+# first occurrence in the page
+_STATS_RE = re.compile(
+    rb'(?=[Kk]ills?[:\s]*(?P<kills>\d{1,3}(?:[,\s]\d{3})*)'
+    rb'|[Dd]eaths?[:\s]*(?P<deaths>\d{1,3}(?:[,\s]\d{3})*)'
+    rb'|[Gg]old[^0-9]*[Bb]oxes?[:\s]*(?P<gold_boxes>\d+)'
+    rb'|[Gg]roup[:\s]*(?P<group>[^<\n\r]+))',
+    re.IGNORECASE
+)
+_STATS_FIELDS = frozenset(_STATS_RE.groupindex)
+
+# Fallback labels, tried in order only when the English label is missing
+_KILL_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+    _ci('Убийства') + rb'[:\s]*(\d{1,3}(?:[,\s]\d{3})*)',
+    rb'"kills"[:\s]*(\d{1,3}(?:[,\s]\d{3})*)',
+))
+_DEATH_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+    _ci('Смерти') + rb'[:\s]*(\d{1,3}(?:[,\s]\d{3})*)',
+    rb'"deaths"[:\s]*(\d{1,3}(?:[,\s]\d{3})*)',
+))
+_GOLD_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+    _ci('Золотые') + rb'[^0-9]*' + _ci('коробки') + rb'[:\s]*(\d+)',
+    rb'"gold_boxes"[:\s]*(\d+)',
+))
+_GROUP_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+    rb'[Cc]lan[:\s]*([^<\n\r]+)',
+    _ci('Группа') + rb'[:\s]*([^<\n\r]+)',
+    rb'"group"[:\s]*"([^"]+)"',
+))
+
+# Activity indicators shown next to the player's name
+_ONLINE_STATUS = '🟢'
+_DEFAULT_STATUS = '🔴'
+
+# Fields every player starts with; username and a fresh equipment dict are added per player
+_PLAYER_DEFAULTS = {
+    'rank': 'Unknown',
+    'experience': 0,
+    'kills': 0,
+    'deaths': 0,
+    'kd_ratio': '0.00',
+    'gold_boxes': 0,
+    'premium': False,
+    'group': 'Unknown',
+    'is_online': False,
+    'status_indicator': _DEFAULT_STATUS,
+}
+
+def _first_match(patterns, html):
+    """Return the first capture of the first pattern that matches."""
+    for pattern in patterns:
+        match = pattern.search(html)
+        if match:
+            return match.group(1)
+    return None
+
+def _group_candidates(stats, html):
+    """Yield possible group names: the English label first, then the fallbacks."""
+    if 'group' in stats:
+        yield stats['group']
+    for pattern in _GROUP_PATTERNS:
+        match = pattern.search(html)
+        if match:
+            yield match.group(1)
+
+def _equipment_re(names):
+    """Build one pattern matching any of the names with an optional modification level."""
+    alternatives = b'|'.join(re.escape(name.encode('utf-8')) for name in sorted(names, key=len, reverse=True))
+    return re.compile(
+        rb'(?P<name>' + alternatives + rb')[^a-zA-Z0-9]*'
+        rb'(?:M(?P<mod>\d+)|(?P<level>\d+))?',  # Name M3 or Name 3 format
+        re.IGNORECASE
+    )
+
+_TURRET_RE = _equipment_re(TURRET_NAMES)
+_HULL_RE = _equipment_re(HULL_NAMES)
+
+def _find_equipment(pattern, names, html):
+    """List equipment found in the page, in the order of `names`, without duplicates.
+
+    For each item, explicit M levels win over bare levels, which win over the bare name.
+    """
+    canonical = {name.lower().encode('utf-8'): name for name in names}
+    found = {}
+    for match in pattern.finditer(html):
+        mods, levels = found.setdefault(canonical[match.group('name').lower()], ([], []))
+        if match.group('mod') is not None:
+            mods.append(match.group('mod').decode('ascii'))
+        elif match.group('level') is not None:
+            levels.append(match.group('level').decode('ascii'))
+    
+    seen = set()
+    equipment = []
+    for name in names:
+        if name not in found:
+            continue
+        mods, levels = found[name]
+        entries = [f"{name} M{level}" for level in (mods or levels)] or [name]
+        for entry in entries:
+            if entry not in seen:
+                seen.add(entry)
+                equipment.append(entry)
+    return equipment
+
+# Rankings pages are transcoded to UTF-8 when fetched; without this lxml guesses Latin-1
+# for pages that don't declare a charset
+_UTF8_HTML_PARSER = lxml.html.HTMLParser(encoding='utf-8')
+
+# Rankings search: elements with a text node containing $name, ASCII case-insensitively
+_USERNAME_XPATH = lxml.etree.XPath(
+    '//*[text()[contains(translate(., $upper, $lower), $name)]]',
+    smart_strings=False
+)
+_XPATH_CASE = {'upper': string.ascii_uppercase, 'lower': string.ascii_lowercase}
+# The nearest row, list item or div holding a matched element
+_ROW_XPATH = lxml.etree.XPath('ancestor-or-self::*[self::tr or self::li or self::div][1]')
+
+def create_http_session(**kwargs):
+    """Create an aiohttp session with a connection pool tuned for the RTanks site."""
+    try:
+        # Non-blocking DNS through c-ares when aiodns is installed
+        resolver = aiohttp.AsyncResolver()
+    except RuntimeError:
+        resolver = None
+    connector = aiohttp.TCPConnector(
+        resolver=resolver,
+        limit=64,
+        limit_per_host=16,
+        use_dns_cache=True,
+        ttl_dns_cache=600,
+        keepalive_timeout=60,
+        force_close=False
+    )
+    return aiohttp.ClientSession(connector=connector, **kwargs)
+
+async def single_flight(inflight, key, fetch):
+    """Await fetch() once per key, sharing the outcome with callers that arrive meanwhile.
+
+    `inflight` maps keys to the futures of calls in progress. Returns (result, ran), where
+    ran is False for callers that joined a call already in flight.
+    """
+    future = inflight.get(key)
+    if future is not None:
+        return await asyncio.shield(future), False
+    
+    future = asyncio.get_running_loop().create_future()
+    inflight[key] = future
+    try:
+        result = await fetch()
+        future.set_result(result)
+        return result, True
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Mark the exception as retrieved in case nobody else is waiting
+        future.exception()
+        raise
+    finally:
+        inflight.pop(key, None)
+
 class RTanksScraper:
-    def __init__(self):
+    def __init__(self, session=None):
         self.base_url = "https://ratings.ranked-rtanks.online"
-        self.session = None
+        # Reuse the caller's session when given; otherwise one is created lazily
+        self.session = session
+        self._owns_session = session is None
+        self._session_lock = asyncio.Lock()
+        self.timeout = aiohttp.ClientTimeout(total=30)
+        
+        # Recently fetched shared rankings pages as url -> (fetched_at, body), in LRU order
+        self._page_cache = OrderedDict()
+        self._page_inflight = {}
         
         # Headers to avoid bot detection
         self.headers = {
@@ -36,13 +329,78 @@ class RTanksScraper:
     async def _get_session(self):
         """Get or create an aiohttp session."""
         if self.session is None or self.session.closed:
-            timeout = aiohttp.ClientTimeout(total=30)
-            self.session = aiohttp.ClientSession(
-                timeout=timeout,
-                headers=self.headers
-            )
+            # Concurrent first requests must not each create their own session
+            async with self._session_lock:
+                if self.session is None or self.session.closed:
+                    self.session = create_http_session(
+                        timeout=self.timeout,
+                        headers=self.headers
+                    )
+                    self._owns_session = True
         return self.session
     
+    async def _get(self, session, url):
+        """GET a URL, backing off only when the server answers 429 Too Many Requests."""
+        for attempt in range(RETRY_MAX_ATTEMPTS + 1):
+            response = await session.get(url, headers=self.headers, timeout=self.timeout)
+            if response.status != 429 or attempt == RETRY_MAX_ATTEMPTS:
+                return response
+            
+            # Honour Retry-After when given in seconds, otherwise back off exponentially
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                delay = min(RETRY_MAX_DELAY, float(retry_after))
+            else:
+                delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt)
+            response.release()
+            
+            logger.warning("Rate limited on %s, retrying in %.1fs", url, delay)
+            await asyncio.sleep(delay)
+    
+    async def _read_body(self, response, limit=MAX_PAGE_BYTES):
+        """Read a response body, cutting it to `limit` bytes unless limit is None."""
+        body = bytearray()
+        async for chunk in response.content.iter_chunked(65536):
+            body.extend(chunk)
+            if limit is not None and len(body) > limit:
+                logger.warning("Truncating %s to %s bytes", response.url, limit)
+                return bytes(body[:limit])
+        return bytes(body)
+    
+    async def _read_utf8(self, response, limit=MAX_PAGE_BYTES):
+        """Read a response body as UTF-8 bytes, cutting it to `limit` bytes unless limit is None."""
+        body = await self._read_body(response, limit)
+        charset = (response.charset or 'utf-8').lower()
+        if charset not in ('utf-8', 'utf8'):
+            body = body.decode(charset, errors='replace').encode('utf-8')
+        return body
+    
+    async def _fetch_page(self, session, url, cache=True):
+        """Fetch a page's HTML as UTF-8 bytes, reusing a recent copy. Returns None unless the status is 200.
+
+        Pages fetched with cache=False are still shared with concurrent callers but never kept.
+        """
+        cached = self._page_cache.get(url)
+        if cached and time.monotonic() - cached[0] < PAGE_CACHE_TTL:
+            self._page_cache.move_to_end(url)
+            return cached[1]
+        
+        async def fetch():
+            async with await self._get(session, url) as response:
+                # Read rankings pages whole; players near the end would otherwise go missing
+                body = await self._read_utf8(response, limit=None) if response.status == 200 else None
+            
+            if body is not None and cache:
+                self._page_cache[url] = (time.monotonic(), body)
+                self._page_cache.move_to_end(url)
+                if len(self._page_cache) > PAGE_CACHE_SIZE:
+                    self._page_cache.popitem(last=False)
+            return body
+        
+        # Concurrent fetches of the same page share one request
+        body, _ = await single_flight(self._page_inflight, url, fetch)
+        return body
+    
     async def get_player_data(self, username):
         """
         Scrape player data from the RTanks ratings website.
@@ -51,114 +409,71 @@ class RTanksScraper:
         try:
             session = await self._get_session()
             
-            # Add random delay to avoid rate limiting
-            await asyncio.sleep(random.uniform(0.5, 1.5))
-            
-            # Try the correct URL pattern for RTanks
-            possible_urls = [
-                f"{self.base_url}/user/{quote(username)}"
-            ]
-            
+            url = f"{self.base_url}/user/{quote(username)}"
             player_data = None
-            for url in possible_urls:
-                try:
-                    async with session.get(url) as response:
-                        if response.status == 200:
-                            html = await response.text()
-                            player_data = await self._parse_player_data(html, username)
-                            if player_data:
-                                break
-                        elif response.status == 404:
-                            continue
-                        else:
-                            logger.warning(f"Unexpected status code {response.status} for {url}")
-                            continue
-                            
-                except asyncio.TimeoutError:
-                    logger.warning(f"Timeout while fetching {url}")
-                    continue
-                except Exception as e:
-                    logger.error(f"Error fetching {url}: {e}")
-                    continue
+            try:
+                async with await self._get(session, url) as response:
+                    if response.status == 200:
+                        body = await self._read_utf8(response)
+                        player_data = await self._parse_player_data(body, username)
+                    elif response.status != 404:
+                        logger.warning("Unexpected status code %s for %s", response.status, url)
+                        
+            except asyncio.TimeoutError:
+                logger.warning("Timeout while fetching %s", url)
+            except Exception as e:
+                logger.error("Error fetching %s: %s", url, e)
             
             if not player_data:
                 # Try searching the main page for the player
-                player_data = await self._search_player_on_main_page(username)
+                player_data = await self._search_player_on_main_page(session, username)
             
             return player_data
             
         except Exception as e:
-            logger.error(f"Error in get_player_data: {e}")
+            logger.error("Error in get_player_data: %s", e)
             return None
     
     async def _parse_player_data(self, html, username):
-        """Parse player data from HTML response."""
+        """Parse player data from the UTF-8 HTML bytes in a worker thread, keeping the event loop free."""
+        return await asyncio.to_thread(self._parse_player_data_sync, html, username)
+    
+    def _parse_player_data_sync(self, html, username):
+        """Parse player data from the UTF-8 bytes of a profile page."""
         try:
-            soup = BeautifulSoup(html, 'html.parser')
-            logger.info(f"Parsing data for {username}")
+            logger.info("Parsing data for %s", username)
+            html_lower = html.lower()
             
             # CRITICAL FIX: Check if this is actually a valid player page
             # First check for error indicators that show player doesn't exist
             error_indicators = [
-                'player not found' in html.lower(),
-                'user not found' in html.lower(),  
-                'not found' in html.lower() and len(html) < 5000,  # Short error page
-                '404' in html and 'error' in html.lower(),
-                'пользователь не найден' in html.lower(),  # Russian "user not found"
-                soup.find(text=re.compile(r'404|not found|error', re.IGNORECASE)) and len(html) < 3000,
+                any(marker in html_lower for marker in _NOT_FOUND_MARKERS),
+                b'not found' in html_lower and len(html) < 5000,  # Short error page
+                b'404' in html and b'error' in html_lower,
                 # Check if page redirects back to main site (common for non-existent players)
                 f'{self.base_url}/' == f'{self.base_url}/user/{quote(username)}',  # redirect check
             ]
             
             # If we find error indicators, return None immediately
             if any(error_indicators):
-                logger.info(f"Player {username} not found - error page detected")
+                logger.info("Player %s not found - error page detected", username)
                 return None
             
-            # ENHANCED CHECK: Look for actual player profile structure
-            # Check for specific profile elements that indicate a real player
-            profile_structure_indicators = [
-                # Look for profile container or user profile elements
-                soup.find(class_=re.compile(r'profile|user-info|player-card', re.IGNORECASE)),
-                soup.find(id=re.compile(r'profile|user|player', re.IGNORECASE)),
-                # Look for elements that would contain player stats
-                soup.find(text=re.compile(r'Activity|Активность', re.IGNORECASE)),
-                soup.find(text=re.compile(r'Combat Stats|Статистика боя', re.IGNORECASE)),
-            ]
-            
             # STRICT CHECK: Look for default/template data that indicates fake profile
-            default_data_indicators = [
-                # Check for exact default values that appear for non-existent users
-                re.search(r'14/400', html),  # Default experience pattern
-                re.search(r'Kills:\s*0.*Deaths:\s*0.*K/D:\s*0\.00', html, re.DOTALL),  # Default combat stats
-                re.search(r'Group:\s*Unknown', html),  # Default group
-                # Check if rank is exactly "Recruit" with 14/400 experience (template data)
-                re.search(r'Recruit.*14/400', html, re.DOTALL),
-            ]
-            
             # If we find default/template data patterns, it's likely a fake profile
-            if any(default_data_indicators):
-                logger.info(f"Player {username} not found - template/default data detected")
+            if any(pattern.search(html) for pattern in _DEFAULT_DATA_PATTERNS):
+                logger.info("Player %s not found - template/default data detected", username)
                 return None
             
             # Look for meaningful player data that goes beyond defaults
-            meaningful_data_patterns = [
-                # Look for non-zero, non-default stats
-                r'[Kk]ills?[:\s]*([1-9]\d*)',  # Non-zero kills
-                r'[Dd]eaths?[:\s]*([1-9]\d*)',  # Non-zero deaths  
-                r'(\d{1,3}(?:\s?\d{3})*)\s*/\s*(\d{1,3}(?:\s?\d{3})*)',  # Experience format
-                # Look for ranks other than default Recruit
-                r'(Private|Gefreiter|Corporal|Sergeant|Lieutenant|Captain|Major|Colonel|General|Marshal|Commander|Legend)',
-            ]
-            
             has_meaningful_data = False
-            for pattern in meaningful_data_patterns:
-                match = re.search(pattern, html, re.IGNORECASE)
+            for pattern in _MEANINGFUL_DATA_PATTERNS:
+                match = pattern.search(html)
                 if match:
                     # Additional check: if it's experience format, ensure it's not the default 14/400
-                    if '/' in pattern and match:
-                        current_exp = match.group(1).replace(',', '').replace(' ', '')
-                        if current_exp != '14':  # Not default experience
+                    if b'/' in pattern.pattern and match:
+                        current_exp = match.group(1).translate(None, _NUMBER_SEPARATORS)
+                        if current_exp != b'14':  # Not default experience
                             has_meaningful_data = True
                             break
                     else:
@@ -166,488 +481,190 @@ class RTanksScraper:
                         break
             
             if not has_meaningful_data:
-                logger.info(f"Player {username} not found - no meaningful data beyond defaults")
+                logger.info("Player %s not found - no meaningful data beyond defaults", username)
                 return None
             
             # If we reach here, we have a valid player page - initialize data
-            player_data = {
-                'username': username,
-                'rank': 'Unknown',
-                'experience': 0,
-                'kills': 0,
-                'deaths': 0,
-                'kd_ratio': '0.00',
-                'gold_boxes': 0,
-                'premium': False,
-                'group': 'Unknown',
-                'is_online': False,
-                'status_indicator': '🔴',
-                'equipment': {'turrets': [], 'hulls': []}
-            }
+            player_data = {'username': username, **_PLAYER_DEFAULTS, 'equipment': {'turrets': [], 'hulls': []}}
             
             # Parse activity status from non-displayable span with yes/no text
             # According to website owner: activity is in a non-displayable span with text "yes/no"
-            activity_spans = soup.find_all('span', style=re.compile(r'display:\s*none', re.IGNORECASE))
-            is_online = False
-            
-            # Look for spans with "yes" or "no" text content
-            for span in activity_spans:
-                if span.get_text(strip=True).lower() == 'yes':
-                    is_online = True
-                    logger.info(f"Found activity span with 'yes' - {username} is ONLINE")
-                    break
-                elif span.get_text(strip=True).lower() == 'no':
-                    is_online = False
-                    logger.info(f"Found activity span with 'no' - {username} is OFFLINE")
-                    break
-            
-            # Fallback: also check for hidden spans without explicit display:none style
-            if not any(span.get_text(strip=True).lower() in ['yes', 'no'] for span in activity_spans):
-                all_spans = soup.find_all('span')
-                for span in all_spans:
-                    span_text = span.get_text(strip=True).lower()
-                    if span_text == 'yes':
-                        is_online = True
-                        logger.info(f"Found span with 'yes' text - {username} is ONLINE")
-                        break
-                    elif span_text == 'no':
-                        is_online = False
-                        logger.info(f"Found span with 'no' text - {username} is OFFLINE")
-                        break
+            # Fallback: also check for spans without explicit display:none style
+            activity_match = _ACTIVITY_RE.search(html) or _ANY_ACTIVITY_RE.search(html)
+            is_online = bool(activity_match) and activity_match.group(1).lower() == b'yes'
             
             player_data['is_online'] = is_online
-            player_data['status_indicator'] = '🟢' if is_online else '🔴'
-            logger.info(f"{username} activity status: {'ONLINE' if is_online else 'OFFLINE'}")
+            player_data['status_indicator'] = _ONLINE_STATUS if is_online else _DEFAULT_STATUS
+            logger.info("%s activity status: %s", username, 'ONLINE' if is_online else 'OFFLINE')
             
             # Parse experience FIRST - Look for current/max format like "105613/125000"
-            exp_patterns = [
-                r'(\d{1,3}(?:\s?\d{3})*)\s*/\s*(\d{1,3}(?:\s?\d{3})*)',  # Current/max format with spaces
-                r'(\d{1,3}(?:,\d{3})*)\s*/\s*(\d{1,3}(?:,\d{3})*)',     # Current/max format with commas
-                r'(\d+)\s*/\s*(\d+)',                                     # Simple current/max format
-            ]
-            
             # First try to find current/max experience format
             exp_found = False
-            for pattern in exp_patterns:
-                exp_match = re.search(pattern, html)
+            for pattern in _EXP_PATTERNS:
+                exp_match = pattern.search(html)
                 if exp_match:
-                    current_exp_str = exp_match.group(1).replace(',', '').replace(' ', '')
-                    max_exp_str = exp_match.group(2).replace(',', '').replace(' ', '')
-                    try:
+                    current_exp_str = exp_match.group(1).translate(None, _NUMBER_SEPARATORS)
+                    max_exp_str = exp_match.group(2).translate(None, _NUMBER_SEPARATORS)
+                    if current_exp_str.isdigit() and max_exp_str.isdigit():
                         player_data['experience'] = int(current_exp_str)
                         player_data['max_experience'] = int(max_exp_str)
                         exp_found = True
-                        logger.info(f"Found experience: {player_data['experience']}/{player_data['max_experience']}")
+                        logger.info("Found experience: %s/%s", player_data['experience'], player_data['max_experience'])
                         break
-                    except ValueError:
-                        continue
             
             # If current/max format not found, try single experience value
             if not exp_found:
-                single_exp_patterns = [
-                    r'Experience[^0-9]*(\d{1,3}(?:,?\d{3})*)',
-                    r'Опыт[^0-9]*(\d{1,3}(?:,?\d{3})*)',
-                    r'"experience"[^0-9]*(\d{1,3}(?:,?\d{3})*)'
-                ]
-                
-                for pattern in single_exp_patterns:
-                    exp_match = re.search(pattern, html, re.IGNORECASE)
+                for pattern in _SINGLE_EXP_PATTERNS:
+                    exp_match = pattern.search(html)
                     if exp_match:
-                        exp_str = exp_match.group(1).replace(',', '').replace(' ', '')
+                        exp_str = exp_match.group(1).translate(None, _NUMBER_SEPARATORS)
                         player_data['experience'] = int(exp_str)
-                        logger.info(f"Found single experience: {player_data['experience']}")
+                        logger.info("Found single experience: %s", player_data['experience'])
                         break
             
             # Parse rank - Enhanced detection with experience-based fallback
-            rank_patterns = [
-                r'(Легенда|Legend)\s*(\d*)',
-                r'(Генералиссимус|Generalissimo)',
-                r'(Командир бригады|Brigadier Commander)',
-                r'(Командир полковник|Colonel Commander)',
-                r'(Командир подполковник|Lieutenant Colonel Commander)',
-                r'(Командир майор|Major Commander)',
-                r'(Командир капитан|Captain Commander)',
-                r'(Командир лейтенант|Lieutenant Commander)',
-                r'(Командир|Commander)',
-                r'(Фельдмаршал|Field Marshal)',
-                r'(Маршал|Marshal)',
-                r'(Генерал|General)',
-                r'(Генерал-лейтенант|Lieutenant General)',
-                r'(Генерал-майор|Major General)',
-                r'(Бригадир|Brigadier)',
-                r'(Полковник|Colonel)',
-                r'(Подполковник|Lieutenant Colonel)',
-                r'(Майор|Major)',
-                r'(Капитан|Captain)',
-                r'(Старший лейтенант|First Lieutenant)',
-                r'(Лейтенант|Second Lieutenant)',
-                r'(Старший прапорщик|Master Warrant Officer)',
-                r'(Прапорщик|Warrant Officer)',
-                r'(Старшина|Sergeant Major)',
-                r'(Старший сержант|First Sergeant)',
-                r'(Сержант|Master Sergeant)',
-                r'(Младший сержант|Staff Sergeant)',
-                r'(Ефрейтор|Sergeant)',
-                r'(Старший ефрейтор|Master Corporal)',
-                r'(Капрал|Corporal)',
-                r'(Гефрейтор|Gefreiter)',
-                r'(Рядовой|Private)',
-                r'(Новобранец|Recruit)'
-            ]
-            
             rank_found = False
-            for pattern in rank_patterns:
-                rank_match = re.search(pattern, html, re.IGNORECASE)
-                if rank_match:
-                    rank_text = rank_match.group(1)
-                    # Map Russian ranks to English
-                    rank_mapping = {
-                        'Легенда': 'Legend',
-                        'Генералиссимус': 'Generalissimo',
-                        'Командир бригады': 'Brigadier Commander',
-                        'Командир полковник': 'Colonel Commander',
-                        'Командир подполковник': 'Lieutenant Colonel Commander',
-                        'Командир майор': 'Major Commander',
-                        'Командир капитан': 'Captain Commander',
-                        'Командир лейтенант': 'Lieutenant Commander',
-                        'Командир': 'Commander',
-                        'Фельдмаршал': 'Field Marshal',
-                        'Маршал': 'Marshal',
-                        'Генерал': 'General',
-                        'Генерал-лейтенант': 'Lieutenant General',
-                        'Генерал-майор': 'Major General',
-                        'Бригадир': 'Brigadier',
-                        'Полковник': 'Colonel',
-                        'Подполковник': 'Lieutenant Colonel',
-                        'Майор': 'Major',
-                        'Капитан': 'Captain',
-                        'Старший лейтенант': 'First Lieutenant',
-                        'Лейтенант': 'Second Lieutenant',
-                        'Старший прапорщик': 'Master Warrant Officer',
-                        'Прапорщик': 'Warrant Officer',
-                        'Старшина': 'Sergeant Major',
-                        'Старший сержант': 'First Sergeant',
-                        'Сержант': 'Master Sergeant',
-                        'Младший сержант': 'Staff Sergeant',
-                        'Ефрейтор': 'Sergeant',
-                        'Старший ефрейтор': 'Master Corporal',
-                        'Капрал': 'Corporal',
-                        'Гефрейтор': 'Gefreiter',
-                        'Рядовой': 'Private',
-                        'Новобранец': 'Recruit'
-                    }
-                    
-                    player_data['rank'] = rank_mapping.get(rank_text, rank_text)
-                    
-                    # Handle Legend with number
-                    if len(rank_match.groups()) > 1 and rank_match.group(2):
-                        legend_level = rank_match.group(2)
-                        if legend_level:
-                            player_data['rank'] = f"Legend {legend_level}"
-                    
-                    rank_found = True
-                    logger.info(f"Found rank: {player_data['rank']}")
-                    break
-            
-            # If rank not found by pattern, try experience-based rank detection
-            if not rank_found and player_data['experience'] > 0:
-                from utils import get_max_experience_for_rank
+            rank_match = _RANK_RE.search(html)
+            if rank_match:
+                # Map Russian ranks to English
+                player_data['rank'] = _RANK_LOOKUP[rank_match.group('rank').lower()]
                 
-                experience = player_data['experience']
+                # Handle Legend with number
+                if player_data['rank'] == 'Legend' and rank_match.group('legend'):
+                    player_data['rank'] = f"Legend {rank_match.group('legend').decode('ascii')}"
                 
-                if experience >= 1800000:
-                    # Calculate Legend level
-                    legend_level = max(1, (experience - 1600000) // 200000)
-                    player_data['rank'] = f"Legend {legend_level}"
-                elif experience >= 1600000:
-                    player_data['rank'] = "Generalissimo"
-                elif experience >= 1400000:
-                    player_data['rank'] = "Commander"
-                elif experience >= 1255000:
-                    player_data['rank'] = "Field Marshal"
-                elif experience >= 1122000:
-                    player_data['rank'] = "Marshal"
-                elif experience >= 1000000:
-                    player_data['rank'] = "General"
-                elif experience >= 889000:
-                    player_data['rank'] = "Lieutenant General"
-                elif experience >= 787000:
-                    player_data['rank'] = "Major General"
-                elif experience >= 695000:
-                    player_data['rank'] = "Brigadier"
-                elif experience >= 606000:
-                    player_data['rank'] = "Colonel"
-                elif experience >= 527000:
-                    player_data['rank'] = "Lieutenant Colonel"
-                elif experience >= 455000:
-                    player_data['rank'] = "Major"
-                elif experience >= 390000:
-                    player_data['rank'] = "Captain"
-                elif experience >= 332000:
-                    player_data['rank'] = "First Lieutenant"
-                elif experience >= 280000:
-                    player_data['rank'] = "Second Lieutenant"
-                elif experience >= 233000:
-                    player_data['rank'] = "Third Lieutenant"
-                elif experience >= 192000:
-                    player_data['rank'] = "Warrant Officer 5"
-                elif experience >= 156000:
-                    player_data['rank'] = "Warrant Officer 4"
-                elif experience >= 125000:
-                    player_data['rank'] = "Warrant Officer 3"
-                elif experience >= 98000:
-                    player_data['rank'] = "Warrant Officer 2"
-                elif experience >= 76000:
-                    player_data['rank'] = "Warrant Officer 1"
-                elif experience >= 57000:
-                    player_data['rank'] = "Sergeant Major"
-                elif experience >= 41000:
-                    player_data['rank'] = "First Sergeant"
-                elif experience >= 29000:
-                    player_data['rank'] = "Master Sergeant"
-                elif experience >= 20000:
-                    player_data['rank'] = "Staff Sergeant"
-                elif experience >= 12300:
-                    player_data['rank'] = "Sergeant"
-                elif experience >= 7700:
-                    player_data['rank'] = "Master Corporal"
-                elif experience >= 4400:
-                    player_data['rank'] = "Corporal"
-                elif experience >= 2200:
-                    player_data['rank'] = "Gefreiter"
-                elif experience >= 1000:
-                    player_data['rank'] = "Private"
-                else:
-                    player_data['rank'] = "Recruit"
-                
-                logger.info(f"Rank determined by experience: {player_data['rank']}")
-            
-            # Parse kills and deaths
-            kill_patterns = [
-                r'[Kk]ills?[:\s]*(\d{1,3}(?:[,\s]\d{3})*)',
-                r'Убийства[:\s]*(\d{1,3}(?:[,\s]\d{3})*)',
-                r'"kills"[:\s]*(\d{1,3}(?:[,\s]\d{3})*)'
-            ]
+                rank_found = True
+                logger.info("Found rank: %s", player_data['rank'])
             
-            for pattern in kill_patterns:
-                kill_match = re.search(pattern, html, re.IGNORECASE)
-                if kill_match:
-                    kills_str = kill_match.group(1).replace(',', '').replace(' ', '')
-                    player_data['kills'] = int(kills_str)
-                    logger.info(f"Found kills: {player_data['kills']}")
+            # If rank not found by pattern, try experience-based rank detection
+            if not rank_found and player_data['experience'] > 0:
+                player_data['rank'] = rank_for_experience(player_data['experience'])
+                logger.info("Rank determined by experience: %s", player_data['rank'])
+            
+            # Parse kills, deaths, gold boxes and group in one scan of the page
+            stats = {}
+            for match in _STATS_RE.finditer(html):
+                stats.setdefault(match.lastgroup, match.group(match.lastgroup))
+                if len(stats) == len(_STATS_FIELDS):
                     break
             
-            death_patterns = [
-                r'[Dd]eaths?[:\s]*(\d{1,3}(?:[,\s]\d{3})*)',
-                r'Смерти[:\s]*(\d{1,3}(?:[,\s]\d{3})*)',
-                r'"deaths"[:\s]*(\d{1,3}(?:[,\s]\d{3})*)'
-            ]
+            kills_str = stats.get('kills') or _first_match(_KILL_PATTERNS, html)
+            if kills_str:
+                player_data['kills'] = int(kills_str.translate(None, _NUMBER_SEPARATORS))
+                logger.info("Found kills: %s", player_data['kills'])
             
-            for pattern in death_patterns:
-                death_match = re.search(pattern, html, re.IGNORECASE)
-                if death_match:
-                    deaths_str = death_match.group(1).replace(',', '').replace(' ', '')
-                    player_data['deaths'] = int(deaths_str)
-                    logger.info(f"Found deaths: {player_data['deaths']}")
-                    break
+            deaths_str = stats.get('deaths') or _first_match(_DEATH_PATTERNS, html)
+            if deaths_str:
+                player_data['deaths'] = int(deaths_str.translate(None, _NUMBER_SEPARATORS))
+                logger.info("Found deaths: %s", player_data['deaths'])
             
             # Calculate K/D ratio
-            if player_data['deaths'] == 0:
-                player_data['kd_ratio'] = str(player_data['kills']) if player_data['kills'] > 0 else "0.00"
-            else:
-                player_data['kd_ratio'] = f"{player_data['kills']/player_data['deaths']:.2f}"
+            player_data['kd_ratio'] = calculate_kd_ratio(player_data['kills'], player_data['deaths'])
             
             # Parse gold boxes
-            gold_patterns = [
-                r'[Gg]old[^0-9]*[Bb]oxes?[:\s]*(\d+)',
-                r'Золотые[^0-9]*коробки[:\s]*(\d+)',
-                r'"gold_boxes"[:\s]*(\d+)'
-            ]
-            
-            for pattern in gold_patterns:
-                gold_match = re.search(pattern, html, re.IGNORECASE)
-                if gold_match:
-                    player_data['gold_boxes'] = int(gold_match.group(1))
-                    logger.info(f"Found gold boxes: {player_data['gold_boxes']}")
-                    break
+            gold_str = stats.get('gold_boxes') or _first_match(_GOLD_PATTERNS, html)
+            if gold_str:
+                player_data['gold_boxes'] = int(gold_str)
+                logger.info("Found gold boxes: %s", player_data['gold_boxes'])
             
             # Parse premium status
-            premium_indicators = [
-                'premium' in html.lower(),
-                'премиум' in html.lower(),
-                '"premium": true' in html.lower()
-            ]
-            
-            player_data['premium'] = any(premium_indicators)
+            player_data['premium'] = any(marker in html_lower for marker in _PREMIUM_MARKERS)
             
             # Parse group/clan
-            group_patterns = [
-                r'[Gg]roup[:\s]*([^<\n\r]+)',
-                r'[Cc]lan[:\s]*([^<\n\r]+)',
-                r'Группа[:\s]*([^<\n\r]+)',
-                r'"group"[:\s]*"([^"]+)"'
-            ]
-            
-            for pattern in group_patterns:
-                group_match = re.search(pattern, html, re.IGNORECASE)
-                if group_match:
-                    group_name = group_match.group(1).strip()
-                    if group_name and group_name.lower() not in ['unknown', 'none', 'null', '']:
-                        player_data['group'] = group_name
-                        logger.info(f"Found group: {player_data['group']}")
-                        break
+            for group_name in _group_candidates(stats, html):
+                group_name = group_name.decode('utf-8', errors='replace').strip()
+                if group_name and group_name.lower() not in ['unknown', 'none', 'null', '']:
+                    player_data['group'] = group_name
+                    logger.info("Found group: %s", player_data['group'])
+                    break
             
             # Parse equipment (turrets and hulls)
-            from config import TURRET_NAMES, HULL_NAMES
-            
-            # Find turrets
-            turrets_found = []
-            for turret in TURRET_NAMES:
-                # Look for turret with modification levels
-                turret_patterns = [
-                    rf'{turret}[^a-zA-Z0-9]*M(\d+)',  # Turret M3 format
-                    rf'{turret}[^a-zA-Z0-9]*(\d+)',   # Turret 3 format
-                    rf'{turret}'                       # Just turret name
-                ]
-                
-                for pattern in turret_patterns:
-                    turret_matches = re.findall(pattern, html, re.IGNORECASE)
-                    for match in turret_matches:
-                        if isinstance(match, str) and match.isdigit():
-                            turrets_found.append(f"{turret} M{match}")
-                        elif isinstance(match, str) and not match:
-                            turrets_found.append(turret)
-                        elif match:
-                            turrets_found.append(f"{turret} M{match}")
-                    if turret_matches:
-                        break
-            
-            # Find hulls
-            hulls_found = []
-            for hull in HULL_NAMES:
-                # Look for hull with modification levels
-                hull_patterns = [
-                    rf'{hull}[^a-zA-Z0-9]*M(\d+)',  # Hull M3 format
-                    rf'{hull}[^a-zA-Z0-9]*(\d+)',   # Hull 3 format
-                    rf'{hull}'                       # Just hull name
-                ]
-                
-                for pattern in hull_patterns:
-                    hull_matches = re.findall(pattern, html, re.IGNORECASE)
-                    for match in hull_matches:
-                        if isinstance(match, str) and match.isdigit():
-                            hulls_found.append(f"{hull} M{match}")
-                        elif isinstance(match, str) and not match:
-                            hulls_found.append(hull)
-                        elif match:
-                            hulls_found.append(f"{hull} M{match}")
-                    if hull_matches:
-                        break
-            
-            # Remove duplicates while preserving order
-            player_data['equipment']['turrets'] = list(dict.fromkeys(turrets_found))
-            player_data['equipment']['hulls'] = list(dict.fromkeys(hulls_found))
+            player_data['equipment']['turrets'] = _find_equipment(_TURRET_RE, TURRET_NAMES, html)
+            player_data['equipment']['hulls'] = _find_equipment(_HULL_RE, HULL_NAMES, html)
             
-            logger.info(f"Successfully parsed data for {username}")
+            logger.info("Successfully parsed data for %s", username)
             return player_data
             
         except Exception as e:
-            logger.error(f"Error parsing player data for {username}: {e}")
+            logger.error("Error parsing player data for %s: %s", username, e)
             return None
     
-    async def _search_player_on_main_page(self, username):
+    async def _search_player_on_main_page(self, session, username):
         """Search for player on the main rankings page."""
         try:
-            session = await self._get_session()
+            # Compare raw bytes so pages without the player are never decoded. bytes.lower()
+            # folds only ASCII, so the needle is folded the same way as the page
+            needle = username.encode('utf-8').lower()
             
-            # Try searching on different ranking pages
+            # Try searching on different ranking pages; only the shared ones are worth caching,
+            # since a per-username search page is rarely requested twice within the TTL
             search_urls = [
-                f"{self.base_url}",
-                f"{self.base_url}/rankings",
-                f"{self.base_url}/search?q={quote(username)}"
+                (f"{self.base_url}", True),
+                (f"{self.base_url}/rankings", True),
+                (f"{self.base_url}/search?q={quote(username)}", False)
             ]
             
-            for url in search_urls:
+            for url, cache in search_urls:
                 try:
-                    async with session.get(url) as response:
-                        if response.status == 200:
-                            html = await response.text()
-                            
-                            # Look for the username in the rankings
-                            if username.lower() in html.lower():
-                                # Try to extract basic player info from the rankings
-                                return await self._extract_from_rankings(html, username)
-                            
+                    body = await self._fetch_page(session, url, cache=cache)
+                    
+                    # Look for the username in the rankings
+                    if body and needle in body.lower():
+                        # Try to extract basic player info from the rankings
+                        return await self._extract_from_rankings(body, username)
+                    
                 except Exception as e:
-                    logger.warning(f"Error searching on {url}: {e}")
+                    logger.warning("Error searching on %s: %s", url, e)
                     continue
             
             return None
             
         except Exception as e:
-            logger.error(f"Error in _search_player_on_main_page: {e}")
+            logger.error("Error in _search_player_on_main_page: %s", e)
             return None
     
-    async def _extract_from_rankings(self, html, username):
+    async def _extract_from_rankings(self, body, username):
         """Extract basic player data from rankings page."""
         try:
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # Look for the username in table rows or list items
-            username_pattern = re.compile(re.escape(username), re.IGNORECASE)
+            tree = lxml.html.fromstring(body, parser=_UTF8_HTML_PARSER)
             
-            # Find elements containing the username
-            elements = soup.find_all(text=username_pattern)
+            # Find elements whose own text contains the username, letting libxml2 do the search.
+            # translate() folds only ASCII, so non-ASCII letters must match as typed
+            name = username.encode('utf-8').lower().decode('utf-8')
+            elements = _USERNAME_XPATH(tree, name=name, **_XPATH_CASE)
             
             if not elements:
                 return None
             
             # Try to find the parent row/container with player data
             for element in elements:
-                parent = element.parent
-                while parent and parent.name not in ['tr', 'li', 'div']:
-                    parent = parent.parent
+                rows = _ROW_XPATH(element)
                 
-                if parent:
+                if rows:
                     # Extract what we can from this row
-                    row_text = parent.get_text()
+                    row_text = rows[0].text_content()
                     
                     # Try to extract experience and rank from the row
-                    exp_match = re.search(r'(\d{1,3}(?:[,\s]\d{3})*)', row_text)
+                    exp_match = _ROW_EXP_RE.search(row_text)
                     
                     if exp_match:
                         # We found some data, create minimal player object
-                        player_data = {
-                            'username': username,
-                            'rank': 'Unknown',
-                            'experience': 0,
-                            'kills': 0,
-                            'deaths': 0,
-                            'kd_ratio': '0.00',
-                            'gold_boxes': 0,
-                            'premium': False,
-                            'group': 'Unknown',
-                            'is_online': False,
-                            'status_indicator': '🔴',
-                            'equipment': {'turrets': [], 'hulls': []}
-                        }
+                        player_data = {'username': username, **_PLAYER_DEFAULTS, 'equipment': {'turrets': [], 'hulls': []}}
                         
                         # Extract experience
-                        try:
-                            exp_str = exp_match.group(1).replace(',', '').replace(' ', '')
+                        exp_str = exp_match.group(1).translate(_EXP_STRIP)
+                        if exp_str.isdigit():
                             player_data['experience'] = int(exp_str)
-                        except ValueError:
-                            pass
                         
                         return player_data
             
             return None
             
         except Exception as e:
-            logger.error(f"Error extracting from rankings: {e}")
+            logger.error("Error extracting from rankings: %s", e)
             return None
     
     async def close(self):
-        """Close the aiohttp session."""
-        if self.session and not self.session.closed:
+        """Close the aiohttp session if this scraper created it."""
+        if self._owns_session and self.session and not self.session.closed:
             await self.session.close()
@@ -79,7 +79,7 @@ class RTanksTranslator:
             translated = self._translate_text_sync(rank_text)
             return translated.title() if translated else rank_text
         except Exception as e:
-            logger.warning(f"Failed to translate rank '{rank_text}': {e}")
+            logger.warning("Failed to translate rank '%s': %s", rank_text, e)
             return rank_text
     
     def translate_text(self, text: str) -> str:
@@ -105,7 +105,7 @@ class RTanksTranslator:
                 self.cache[text] = translated
                 return translated
         except Exception as e:
-            logger.warning(f"Failed to translate text '{text}': {e}")
+            logger.warning("Failed to translate text '%s': %s", text, e)
         
         return text
     
@@ -113,7 +113,7 @@ class RTanksTranslator:
         try:
             return self.translator.translate(text)
         except Exception as e:
-            logger.error(f"Translation error: {e}")
+            logger.error("Translation error: %s", e)
             return None
     
     async def translate_text_async(self, text: str) -> str:
@@ -3,8 +3,119 @@ Utility functions for the RTanks Discord Bot.
 """
 
 import math
+import re
+import string
+from bisect import bisect_right
+from collections import namedtuple
+from functools import lru_cache
 from config import RANK_EMOJIS
 
+_NUM_RE = re.compile(r'\d+')
+_LEGEND_RE = re.compile(r'^Legend (\d+)$')
+
+class _KeepTable(dict):
+    """str.translate table that deletes every character it does not list."""
+    def __missing__(self, codepoint):
+        return None
+
+_USERNAME_CHARS = _KeepTable((ord(c), ord(c)) for c in string.ascii_letters + string.digits + '_-')
+
+# Minimum experience for each rank below Legend, ascending
+_RANK_THRESHOLDS = (
+    0, 1000, 2200, 4400, 7700, 12300, 20000, 29000, 41000, 57000,
+    76000, 98000, 125000, 156000, 192000, 233000, 280000, 332000, 390000, 455000,
+    527000, 606000, 695000, 787000, 889000, 1000000, 1122000, 1255000, 1400000, 1600000,
+)
+_RANK_THRESHOLD_NAMES = (
+    'Recruit', 'Private', 'Gefreiter', 'Corporal', 'Master Corporal',
+    'Sergeant', 'Staff Sergeant', 'Master Sergeant', 'First Sergeant', 'Sergeant Major',
+    'Warrant Officer 1', 'Warrant Officer 2', 'Warrant Officer 3', 'Warrant Officer 4', 'Warrant Officer 5',
+    'Third Lieutenant', 'Second Lieutenant', 'First Lieutenant', 'Captain', 'Major',
+    'Lieutenant Colonel', 'Colonel', 'Brigadier', 'Major General', 'Lieutenant General',
+    'General', 'Marshal', 'Field Marshal', 'Commander', 'Generalissimo',
+)
+
+# Emoji index for each rank name, lowercased with underscores for spaces
+_RANK_EMOJI_INDEX = {
+    'recruit': 1,
+    'private': 2,
+    'gefreiter': 3,
+    'corporal': 4,
+    'master_corporal': 5,
+    'sergeant': 6,
+    'staff_sergeant': 7,
+    'master_sergeant': 8,
+    'first_sergeant': 9,
+    'sergeant_major': 10,
+    'warrant_officer_1': 11,
+    'warrant_officer_2': 12,
+    'warrant_officer_3': 13,
+    'warrant_officer_4': 14,
+    'warrant_officer_5': 15,
+    'third_lieutenant': 16,
+    'second_lieutenant': 17,
+    'first_lieutenant': 18,
+    'captain': 19,
+    'major': 20,
+    'lieutenant_colonel': 21,
+    'colonel': 22,
+    'brigadier': 23,
+    'major_general': 24,
+    'lieutenant_general': 25,
+    'general': 26,
+    'marshal': 27,
+    'field_marshal': 28,
+    'commander': 29,
+    'generalissimo': 30,
+}
+
+# Emoji for every spelling of a rank name: the index keys plus their spaced and title-cased forms
+_LEGEND_EMOJI = RANK_EMOJIS.get(31, '🏆')
+_RANK_TO_EMOJI = {
+    spelling: RANK_EMOJIS.get(index, '🏆')
+    for name, index in _RANK_EMOJI_INDEX.items()
+    for spelling in (name, name.replace('_', ' '), name.title().replace('_', ' '))
+}
+
+# Experience needed to leave each rank
+_RANK_XP = {
+    'Recruit': 400,
+    'Private': 1000, 
+    'Gefreiter': 2200,
+    'Corporal': 4400,
+    'Master Corporal': 7700,
+    'Sergeant': 12300,
+    'Staff Sergeant': 20000,
+    'Master Sergeant': 29000,
+    'First Sergeant': 41000,
+    'Sergeant Major': 57000,
+    'Warrant Officer 1': 76000,
+    'Warrant Officer 2': 98000,
+    'Warrant Officer 3': 125000,
+    'Warrant Officer 4': 156000,
+    'Warrant Officer 5': 192000,
+    'Third Lieutenant': 233000,
+    'Second Lieutenant': 280000,
+    'First Lieutenant': 332000,
+    'Captain': 390000,
+    'Major': 455000,
+    'Lieutenant Colonel': 527000,
+    'Colonel': 606000,
+    'Brigadier': 695000,
+    'Major General': 787000,
+    'Lieutenant General': 889000,
+    'General': 1000000,
+    'Marshal': 1122000,
+    'Field Marshal': 1255000,
+    'Commander': 1400000,
+    'Generalissimo': 1600000,
+    'Legend': 1800000  # Base for Legend 1, increases by 200k each level
+}
+
+# Abbreviation suffixes for format_number, largest first
+_SUFFIXES = ((1000000000, 'B'), (1000000, 'M'), (1000, 'K'))
+
+@lru_cache(maxsize=4096)
 def format_number(num):
     """Format a number with appropriate suffixes (K, M, B)."""
     if num == 0:
@@ -12,143 +123,92 @@ def format_number(num):
     
     if num < 1000:
         return str(num)
-    elif num < 1000000:
-        return f"{num/1000:.1f}K"
-    elif num < 1000000000:
-        return f"{num/1000000:.1f}M"
-    else:
-        return f"{num/1000000000:.1f}B"
+    
+    for threshold, suffix in _SUFFIXES:
+        if num >= threshold:
+            return f"{num/threshold:.1f}{suffix}"
 
+@lru_cache(maxsize=4096)
 def format_exact_number(num):
     """Format a number with comma separators for exact display."""
-    return f"{num:,}"
+    return format(num, ',')
 
 def get_rank_emoji(rank_name):
     """Get the appropriate emoji for a rank."""
-    # Handle dynamic Legend ranks (Legend 1, Legend 2, etc.)
-    if rank_name.startswith('Legend'):
-        return RANK_EMOJIS.get(31, '🏆')  # All Legend ranks use emoji 31
+    emoji = _RANK_TO_EMOJI.get(rank_name)
+    if emoji is not None:
+        return emoji
     
-    rank_name = rank_name.lower().replace(' ', '_')
-    
-    # Map rank names to emoji indices based on the new rank chart
-    rank_mapping = {
-        'recruit': 1,
-        'private': 2,
-        'gefreiter': 3,
-        'corporal': 4,
-        'master_corporal': 5,
-        'sergeant': 6,
-        'staff_sergeant': 7,
-        'master_sergeant': 8,
-        'first_sergeant': 9,
-        'sergeant_major': 10,
-        'warrant_officer_1': 11,
-        'warrant_officer_2': 12,
-        'warrant_officer_3': 13,
-        'warrant_officer_4': 14,
-        'warrant_officer_5': 15,
-        'third_lieutenant': 16,
-        'second_lieutenant': 17,
-        'first_lieutenant': 18,
-        'captain': 19,
-        'major': 20,
-        'lieutenant_colonel': 21,
-        'colonel': 22,
-        'brigadier': 23,
-        'major_general': 24,
-        'lieutenant_general': 25,
-        'general': 26,
-        'marshal': 27,
-        'field_marshal': 28,
-        'commander': 29,
-        'generalissimo': 30,
-        'legend': 31,
-        'legend_premium': 31
-    }
+    # Handle dynamic Legend ranks (Legend 1, Legend 2, etc.)
+    if rank_name[:6] == 'Legend':
+        return _LEGEND_EMOJI  # All Legend ranks use emoji 31
     
-    emoji_index = rank_mapping.get(rank_name, 31)  # Default to legend
-    return RANK_EMOJIS.get(emoji_index, '🏆')
+    return _RANK_TO_EMOJI.get(rank_name.lower().replace(' ', '_'), _LEGEND_EMOJI)  # Default to legend
 
 def format_duration(seconds):
     """Format duration in seconds to a readable string."""
-    if seconds < 60:
-        return f"{int(seconds)}s"
-    elif seconds < 3600:
-        minutes = int(seconds // 60)
-        secs = int(seconds % 60)
-        return f"{minutes}m {secs}s"
-    elif seconds < 86400:
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
+    days, rest = divmod(int(seconds), 86400)
+    hours, rest = divmod(rest, 3600)
+    minutes, secs = divmod(rest, 60)
+    
+    if days:
+        return f"{days}d {hours}h"
+    elif hours:
         return f"{hours}h {minutes}m"
+    elif minutes:
+        return f"{minutes}m {secs}s"
     else:
-        days = int(seconds // 86400)
-        hours = int((seconds % 86400) // 3600)
-        return f"{days}d {hours}h"
+        return f"{secs}s"
 
+@lru_cache(maxsize=4096)
 def calculate_kd_ratio(kills, deaths):
     """Calculate K/D ratio safely."""
     if deaths == 0:
         return str(kills) if kills > 0 else "0.00"
-    return f"{kills/deaths:.2f}"
+    ratio = kills / deaths
+    return format(ratio, '.2f')
 
 def extract_numbers(text):
     """Extract all numbers from a text string."""
-    import re
-    return [int(match) for match in re.findall(r'\d+', text)]
+    return [int(match) for match in _NUM_RE.findall(text)]
 
 def sanitize_username(username):
     """Sanitize username for safe URL usage."""
-    import re
-    return re.sub(r'[^a-zA-Z0-9_-]', '', username)
+    return username.translate(_USERNAME_CHARS)
 
+@lru_cache(maxsize=64)
 def get_max_experience_for_rank(rank):
     """Get the maximum experience for a given rank based on the progression chart."""
-    rank_experience_map = {
-        'Recruit': 400,
-        'Private': 1000, 
-        'Gefreiter': 2200,
-        'Corporal': 4400,
-        'Master Corporal': 7700,
-        'Sergeant': 12300,
-        'Staff Sergeant': 20000,
-        'Master Sergeant': 29000,
-        'First Sergeant': 41000,
-        'Sergeant Major': 57000,
-        'Warrant Officer 1': 76000,
-        'Warrant Officer 2': 98000,
-        'Warrant Officer 3': 125000,
-        'Warrant Officer 4': 156000,
-        'Warrant Officer 5': 192000,
-        'Third Lieutenant': 233000,
-        'Second Lieutenant': 280000,
-        'First Lieutenant': 332000,
-        'Captain': 390000,
-        'Major': 455000,
-        'Lieutenant Colonel': 527000,
-        'Colonel': 606000,
-        'Brigadier': 695000,
-        'Major General': 787000,
-        'Lieutenant General': 889000,
-        'General': 1000000,
-        'Marshal': 1122000,
-        'Field Marshal': 1255000,
-        'Commander': 1400000,
-        'Generalissimo': 1600000,
-        'Legend': 1800000  # Base for Legend 1, increases by 200k each level
-    }
-    
     # Handle Legend ranks with levels
     if rank.startswith('Legend'):
-        if rank == 'Legend':
-            return 1800000  # Legend 1 max
-        else:
-            # Extract level from "Legend X" format
-            try:
-                level = int(rank.split(' ')[1])
-                return 1600000 + (level * 200000)  # Base + level * 200k
-            except (IndexError, ValueError):
-                return 1800000
+        # Extract level from "Legend X" format; plain "Legend" is Legend 1
+        legend_match = _LEGEND_RE.match(rank)
+        if legend_match:
+            return 1600000 + (int(legend_match.group(1)) * 200000)  # Base + level * 200k
+        return 1800000  # Legend 1 max
     
-    return rank_experience_map.get(rank, 0)
+    return _RANK_XP.get(rank, 0)
+
+def rank_for_experience(experience):
+    """Determine the rank a player holds with the given experience."""
+    if experience >= 1800000:
+        # Calculate Legend level
+        return f"Legend {max(1, (experience - 1600000) // 200000)}"
+    return _RANK_THRESHOLD_NAMES[bisect_right(_RANK_THRESHOLDS, experience) - 1]
+
+# Display strings for the numeric part of a player card
+PlayerCard = namedtuple('PlayerCard', 'rank_emoji experience kills deaths kd_ratio')
+
+@lru_cache(maxsize=2048)
+def format_player_card(rank, experience, max_experience, kills, deaths):
+    """Format a player's rank emoji, experience and combat stats for display."""
+    experience_text = format_exact_number(experience)
+    if max_experience:
+        experience_text = f"{experience_text}/{format_exact_number(max_experience)}"
+    return PlayerCard(
+        rank_emoji=get_rank_emoji(rank),
+        experience=experience_text,
+        kills=format_exact_number(kills),
+        deaths=format_exact_number(deaths),
+        kd_ratio=calculate_kd_ratio(kills, deaths)
+    )